@@ -3,21 +3,84 @@ AI Agent Integration Example
 
 This example demonstrates how to integrate Ad-Tokens API with AI agents
 like OpenAI GPT-4 or Anthropic Claude for contextual product recommendations.
+
+Requires: pip install 'httpx[http2]' orjson
+Optional: pip install numpy sentence-transformers faiss-cpu (for SemanticSearchCache)
+Optional: pip install uvloop (faster event loop)
 """
 
 import asyncio
+import copy
+import functools
+import hashlib
 import os
-import httpx
+import time
+from collections import OrderedDict
 from typing import Optional
 
+import httpx
+import orjson
+
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # Semantic caching is optional
+    faiss = None
+    np = None
+    SentenceTransformer = None
+
+
+# Shared by every AdTokensAgent, so each new agent skips reloading the CA bundle
+SSL_CONTEXT = httpx.create_ssl_context()
+
+DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=1.0)
+
 
 class AdTokensAgent:
-    """Wrapper class for integrating Ad-Tokens with AI agents."""
+    """
+    Wrapper class for integrating Ad-Tokens with AI agents.
+    
+    All requests share one pooled HTTP client, so only the first call pays
+    for the TCP + TLS handshake. Use the agent as an async context manager
+    (or call close()) to wait for pending click tracking and release the
+    pooled connections on shutdown.
+    """
     
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.ad-tokens.com"
         self.session_id: Optional[str] = None
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                "x-api-key": api_key,
+                "Content-Type": "application/json",
+            },
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+            verify=SSL_CONTEXT,
+            timeout=DEFAULT_TIMEOUT,
+        )
+        # Strong references keep in-flight tracking tasks from being
+        # garbage collected; each task removes itself when done
+        self._pending_clicks: set[asyncio.Task] = set()
+    
+    async def __aenter__(self) -> "AdTokensAgent":
+        return self
+    
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Flush pending clicks, then close the shared HTTP client."""
+        await self.flush()
+        await self._client.aclose()
+    
+    async def flush(self) -> None:
+        """Wait for all pending click-tracking requests to finish."""
+        if self._pending_clicks:
+            await asyncio.gather(*self._pending_clicks)
     
     async def search_products(
         self,
@@ -36,35 +99,27 @@ class AdTokensAgent:
         Returns:
             Search results with products
         """
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "query": query,
-                "limit": limit,
-            }
-            
-            if self.session_id:
-                payload["session_id"] = self.session_id
-            
-            if conversation_context:
-                payload["conversation_context"] = conversation_context
-            
-            response = await client.post(
-                f"{self.base_url}/search",
-                headers={
-                    "x-api-key": self.api_key,
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            # Store session_id for future requests
-            if "metadata" in result and "session_id" in result["metadata"]:
-                self.session_id = result["metadata"]["session_id"]
-            
-            return result
+        payload = {
+            "query": query,
+            "limit": limit,
+        }
+        
+        if self.session_id:
+            payload["session_id"] = self.session_id
+        
+        if conversation_context:
+            payload["conversation_context"] = conversation_context
+        
+        response = await self._client.post("/search", content=orjson.dumps(payload))
+        response.raise_for_status()
+        result = orjson.loads(response.content)
+        
+        # Store session_id for future requests
+        session_id = (result.get("metadata") or {}).get("session_id")
+        if session_id:
+            self.session_id = session_id
+        
+        return result
     
     def format_products_for_agent(self, products: list[dict]) -> str:
         """
@@ -79,31 +134,283 @@ class AdTokensAgent:
         if not products:
             return "No products found."
         
-        formatted = "Here are some product recommendations:\n\n"
-        
-        for i, product in enumerate(products, 1):
-            formatted += f"{i}. **{product['title']}**\n"
-            formatted += f"   - Price: {product['price']}\n"
-            formatted += f"   - Merchant: {product['merchant']}\n"
-            formatted += f"   - {product['relevance_explanation']}\n"
-            formatted += f"   - [View Product]({product['url']})\n\n"
+        parts = ["Here are some product recommendations:\n\n"]
+        parts.extend(
+            f"{i}. **{product['title']}**\n"
+            f"   - Price: {product['price']}\n"
+            f"   - Merchant: {product['merchant']}\n"
+            f"   - {product['relevance_explanation']}\n"
+            f"   - [View Product]({product['url']})\n\n"
+            for i, product in enumerate(products, 1)
+        )
         
         if products[0].get("disclosure_text"):
-            formatted += f"\n{products[0]['disclosure_text']}\n"
+            parts.append(f"\n{products[0]['disclosure_text']}\n")
+        
+        return "".join(parts)
+    
+    def track_click(self, impression_id: str) -> asyncio.Task:
+        """
+        Track a product click for attribution in the background.
+        
+        The request runs concurrently with whatever the agent does next.
+        Await the returned task to wait for this click, or call flush()
+        to wait for all of them.
+        
+        Args:
+            impression_id: The impression_id from the product result
+            
+        Returns:
+            Task that completes when the click has been recorded
+        """
+        task = asyncio.create_task(self._post_click(impression_id))
+        self._pending_clicks.add(task)
+        task.add_done_callback(self._pending_clicks.discard)
+        return task
+    
+    async def _post_click(self, impression_id: str):
+        try:
+            await self._client.post(f"/clicks/{impression_id}")
+        except Exception as e:
+            print(f"Warning: Failed to track click: {e}")
+
+
+@functools.cache
+def get_embed_model(model_name: str = "all-MiniLM-L6-v2") -> "SentenceTransformer":
+    """
+    Load an embedding model once per process.
+    
+    Every SemanticSearchCache shares the same instance instead of reloading
+    ~80 MB of weights from disk for each new agent.
+    """
+    return SentenceTransformer(model_name)
+
+
+class SemanticSearchCache:
+    """
+    Client-side semantic cache in front of AdTokensAgent.search_products.
+    
+    Repeated or near-identical queries are answered from memory instead of
+    a network round trip. A lookup first tries an exact sha256 key of the
+    query, conversation history and session, then searches an HNSW index of
+    cached query embeddings for matches above `threshold`. A similar query
+    is only served if its conversation history also matches: the mean
+    embedding of the earlier turns must be within `context_threshold` of
+    the cached one, so contextual follow-ups ("something cheaper?") are not
+    answered with results for a different conversation. Hits must also
+    belong to the agent's current session. Entries are evicted
+    least-recently-used and expire after `ttl` seconds.
+    """
+    
+    # Nearest neighbours fetched per lookup before session/context filtering
+    search_k = 16
+    
+    def __init__(
+        self,
+        agent: AdTokensAgent,
+        threshold: float = 0.92,
+        context_threshold: float = 0.95,
+        maxsize: int = 1024,
+        ttl: float = 3600.0,
+        model_name: str = "all-MiniLM-L6-v2",
+    ):
+        if SentenceTransformer is None:
+            raise ImportError(
+                "SemanticSearchCache requires: pip install numpy sentence-transformers faiss-cpu"
+            )
+        
+        self.agent = agent
+        self.threshold = threshold
+        self.context_threshold = context_threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._model = get_embed_model(model_name)
+        self._dim = self._model.get_sentence_embedding_dimension()
+        
+        # HNSW does not support deletes: evicted vectors stay in the index
+        # until enough accumulate to rebuild it from the live entries
+        self._index = self._new_index()
+        # Index id -> cache entry
+        self._entries: dict[int, dict] = {}
+        # Exact request key -> index id, ordered from least to most recently used
+        self._ids: OrderedDict[str, int] = OrderedDict()
+    
+    async def search_products(
+        self,
+        query: str,
+        limit: int = 3,
+        conversation_context: Optional[list] = None,
+    ) -> dict:
+        """
+        Search for products, serving cached results when possible.
+        
+        Args:
+            query: User query or intent
+            limit: Number of results (1-10)
+            conversation_context: Optional conversation history
+            
+        Returns:
+            Search results with products
+        """
+        now = time.monotonic()
+        # The query carries the latest intent; earlier turns form the context chain
+        history = (conversation_context or [])[:-1]
         
-        return formatted
+        # Fast path: the exact same request was already answered
+        key = self._request_key(query, limit, history)
+        entry = self._entries.get(self._ids.get(key, -1))
+        if entry is not None and self._is_valid(entry, limit, now):
+            return self._hit(entry)
+        
+        # Embedding is CPU-bound, keep it off the event loop
+        query_vec, context_vec = await asyncio.to_thread(self._embed, query, history)
+        entry = self._find_similar(query_vec, context_vec, limit, now)
+        if entry is not None:
+            return self._hit(entry)
+        
+        self.misses += 1
+        result = await self.agent.search_products(query, limit, conversation_context)
+        # Re-key under the session_id the search may have just assigned
+        key = self._request_key(query, limit, history)
+        # Cache a private copy so callers can modify the result they get back
+        self._store(key, query_vec, context_vec, limit, copy.deepcopy(result))
+        return result
+    
+    def _request_key(self, query: str, limit: int, history: list) -> str:
+        """Hash the request and its context chain so repeats hit without embedding."""
+        request = orjson.dumps(
+            {
+                "query": query,
+                "limit": limit,
+                "history": history,
+                "session_id": self.agent.session_id,
+            },
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(request).hexdigest()
     
-    async def track_click(self, impression_id: str):
-        """Track a product click for attribution."""
-        async with httpx.AsyncClient() as client:
-            try:
-                await client.post(
-                    f"{self.base_url}/clicks/{impression_id}",
-                    headers={"x-api-key": self.api_key},
-                    timeout=5.0,
-                )
-            except Exception as e:
-                print(f"Warning: Failed to track click: {e}")
+    def _embed(
+        self, query: str, history: list
+    ) -> tuple["np.ndarray", Optional["np.ndarray"]]:
+        """
+        Embed the query and the conversation history as unit vectors.
+        
+        The history is represented by the mean of its per-turn embeddings,
+        or None when there is no history. Inner products of unit vectors
+        are cosine similarities.
+        """
+        texts = [query, *(turn["content"] for turn in history)]
+        vectors = self._model.encode(texts, normalize_embeddings=True).astype(np.float32)
+        if len(vectors) == 1:
+            return vectors[0], None
+        
+        context_vec = vectors[1:].mean(axis=0)
+        return vectors[0], context_vec / np.linalg.norm(context_vec)
+    
+    def _new_index(self) -> "faiss.Index":
+        """
+        Create an empty HNSW index storing int8-quantized vectors.
+        
+        Every component of a unit vector lies in [-1, 1], so the scalar
+        quantizer is trained on those bounds instead of sample data.
+        """
+        index = faiss.IndexHNSWSQ(
+            self._dim, faiss.ScalarQuantizer.QT_8bit, 32, faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efSearch = 64
+        bounds = np.stack([-np.ones(self._dim), np.ones(self._dim)])
+        index.train(bounds.astype(np.float32))
+        return index
+    
+    def _find_similar(
+        self,
+        query_vec: "np.ndarray",
+        context_vec: Optional["np.ndarray"],
+        limit: int,
+        now: float,
+    ) -> Optional[dict]:
+        """Return the most similar valid entry with a matching context chain."""
+        scores, ids = self._index.search(query_vec[None], self.search_k)
+        # Results are sorted by score; missing neighbours are padded with -1
+        for score, index_id in zip(scores[0], ids[0]):
+            if index_id < 0 or score < self.threshold:
+                break
+            entry = self._entries.get(int(index_id))
+            if (
+                entry is not None
+                and self._is_valid(entry, limit, now)
+                and self._same_context(entry, context_vec)
+            ):
+                return entry
+        return None
+    
+    def _same_context(self, entry: dict, context_vec: Optional["np.ndarray"]) -> bool:
+        """Check that a cached entry was answered in a matching conversation."""
+        cached_vec = entry["context_vec"]
+        if cached_vec is None or context_vec is None:
+            return cached_vec is None and context_vec is None
+        return float(cached_vec @ context_vec) >= self.context_threshold
+    
+    def _is_valid(self, entry: dict, limit: int, now: float) -> bool:
+        """Check that an entry may answer a request, dropping it if expired."""
+        if entry["expires_at"] <= now:
+            self._evict(entry["key"])
+            return False
+        return entry["limit"] == limit and entry["session_id"] == self.agent.session_id
+    
+    def _hit(self, entry: dict) -> dict:
+        self._ids.move_to_end(entry["key"])
+        self.hits += 1
+        # Hand out a copy so changes made by the caller never leak into the cache
+        return copy.deepcopy(entry["response"])
+    
+    def _store(
+        self,
+        key: str,
+        query_vec: "np.ndarray",
+        context_vec: Optional["np.ndarray"],
+        limit: int,
+        response: dict,
+    ):
+        if key in self._ids:
+            self._evict(key)
+        if len(self._ids) >= self.maxsize:
+            # Evict the least recently used entry
+            self._evict(next(iter(self._ids)))
+        if self._index.ntotal - len(self._ids) >= self.maxsize:
+            self._rebuild_index()
+        
+        index_id = self._index.ntotal
+        self._index.add(query_vec[None])
+        self._entries[index_id] = {
+            "key": key,
+            "limit": limit,
+            "context_vec": context_vec,
+            # search_products has already stored the session_id it returned
+            "session_id": self.agent.session_id,
+            "response": response,
+            "expires_at": time.monotonic() + self.ttl,
+        }
+        self._ids[key] = index_id
+    
+    def _evict(self, key: str):
+        # The vector stays in the index until the next rebuild
+        del self._entries[self._ids.pop(key)]
+    
+    def _rebuild_index(self):
+        """Re-create the index from live entries, dropping evicted vectors."""
+        live_ids = list(self._ids.values())
+        index = self._new_index()
+        if live_ids:
+            index.add(np.stack([self._index.reconstruct(i) for i in live_ids]))
+        
+        self._index = index
+        self._entries = {
+            new_id: self._entries[old_id] for new_id, old_id in enumerate(live_ids)
+        }
+        self._ids = OrderedDict((key, new_id) for new_id, key in enumerate(self._ids))
 
 
 async def simulate_agent_conversation():
@@ -166,6 +473,8 @@ async def simulate_agent_conversation():
         
     except Exception as e:
         print(f"❌ Error: {e}")
+    finally:
+        await agent.close()
 
 
 async def openai_integration_example():
@@ -181,6 +490,7 @@ async def openai_integration_example():
 from openai import AsyncOpenAI
 
 client = AsyncOpenAI(api_key="your-openai-key")
+# Create the agent once and reuse it so requests share pooled connections
 ad_tokens = AdTokensAgent(api_key="your-ad-tokens-key")
 
 # Define function for OpenAI
@@ -230,11 +540,50 @@ if response.choices[0].message.tool_calls:
     print(example_code)
 
 
+async def semantic_cache_example():
+    """
+    Answer a near-identical follow-up query from the semantic cache.
+    Requires numpy, sentence-transformers and faiss-cpu.
+    """
+    api_key = os.getenv("AD_TOKENS_API_KEY", "your-api-key-here")
+    
+    if api_key == "your-api-key-here":
+        return
+    
+    print("\n🧠 Semantic Cache Example\n")
+    
+    if SentenceTransformer is None:
+        print("⚠️  Install numpy, sentence-transformers and faiss-cpu to run this example")
+        return
+    
+    async with AdTokensAgent(api_key) as agent:
+        cache = SemanticSearchCache(agent)
+        
+        try:
+            for query in ("podcast microphone", "microphone for podcasting"):
+                start = time.perf_counter()
+                result = await cache.search_products(query)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                print(f"  {query}: {len(result['results'])} products in {elapsed_ms:.1f}ms")
+            
+            print(f"\n  Cache hits: {cache.hits}, misses: {cache.misses}")
+            
+        except Exception as e:
+            print(f"❌ Error: {e}")
+
+
 async def main():
     await simulate_agent_conversation()
+    await semantic_cache_example()
     await openai_integration_example()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        # libuv-based event loop with lower per-callback overhead
+        uvloop.run(main())
 
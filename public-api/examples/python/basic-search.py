@@ -2,40 +2,69 @@
 Basic Product Search Example
 
 This example demonstrates how to perform a simple product search using the Ad-Tokens API.
+
+Requires: pip install 'httpx[http2]' orjson
+Optional: pip install uvloop (faster event loop)
 """
 
 import asyncio
 import os
 import httpx
+import orjson
+
+
+DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=1.0)
 
 
-async def search_products(query: str, api_key: str) -> dict:
+class AdTokensClient:
     """
-    Search for products using the Ad-Tokens API.
+    Minimal Ad-Tokens client that reuses one pooled HTTP connection.
     
-    Args:
-        query: The search query (user intent)
-        api_key: Your Ad-Tokens API key
-        
-    Returns:
-        Dictionary containing search results
+    Use as an async context manager so the connection is closed on exit.
     """
-    async with httpx.AsyncClient() as client:
+    
+    def __init__(self, api_key: str, base_url: str = "https://api.ad-tokens.com"):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "x-api-key": api_key,
+                "Content-Type": "application/json",
+            },
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+            timeout=DEFAULT_TIMEOUT,
+        )
+    
+    async def __aenter__(self) -> "AdTokensClient":
+        return self
+    
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client and its pooled connections."""
+        await self._client.aclose()
+    
+    async def search_products(self, query: str) -> dict:
+        """
+        Search for products using the Ad-Tokens API.
+        
+        Args:
+            query: The search query (user intent)
+            
+        Returns:
+            Dictionary containing search results
+        """
         try:
-            response = await client.post(
-                "https://api.ad-tokens.com/search",
-                headers={
-                    "x-api-key": api_key,
-                    "Content-Type": "application/json",
-                },
-                json={
+            response = await self._client.post(
+                "/search",
+                content=orjson.dumps({
                     "query": query,
                     "limit": 3,
-                },
-                timeout=10.0,
+                }),
             )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except httpx.HTTPStatusError as e:
             print(f"HTTP error occurred: {e.response.status_code}")
             print(f"Error: {e.response.text}")
@@ -59,7 +88,8 @@ async def main():
     print(f"🔍 Searching for: {query}\n")
     
     try:
-        result = await search_products(query, api_key)
+        async with AdTokensClient(api_key) as client:
+            result = await client.search_products(query)
         
         # Display results
         print(f"✅ Found {len(result['results'])} products\n")
@@ -77,15 +107,23 @@ async def main():
         
         # Display metadata
         metadata = result.get("metadata", {})
-        if "total_matches" in metadata:
-            print(f"Total matches: {metadata['total_matches']}")
-        if "session_id" in metadata:
-            print(f"Session ID: {metadata['session_id']}")
+        total_matches = metadata.get("total_matches")
+        if total_matches is not None:
+            print(f"Total matches: {total_matches}")
+        session_id = metadata.get("session_id")
+        if session_id is not None:
+            print(f"Session ID: {session_id}")
             
     except Exception as e:
         print(f"❌ Error: {e}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        # libuv-based event loop with lower per-callback overhead
+        uvloop.run(main())
 
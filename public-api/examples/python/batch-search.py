@@ -3,45 +3,199 @@ Batch Search Example
 
 This example demonstrates how to search for multiple queries in a single request,
 which is more efficient than making multiple sequential calls.
+
+Requires: pip install 'httpx[http2]' cachetools ijson orjson
+Optional: pip install uvloop (faster event loop)
 """
 
 import asyncio
+import copy
+import hashlib
 import os
+from typing import AsyncIterator
+
 import httpx
+import ijson
+import orjson
+from cachetools import TTLCache
+
+
+DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=1.0)
+# Batch searches run several queries server-side, so allow a longer read
+BATCH_TIMEOUT = httpx.Timeout(connect=2.0, read=30.0, write=5.0, pool=1.0)
+
+# Marks a cache miss or the end of a result stream, since a result may be null
+_MISSING = object()
+
+
+class _AsyncByteReader:
+    """Adapt an async byte iterator to the async read() interface ijson expects."""
+    
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+    
+    async def read(self, size: int = -1) -> bytes:
+        # ijson probes the source with read(0) to detect bytes vs str
+        if size == 0:
+            return b""
+        return await anext(self._chunks, b"")
 
 
-async def batch_search(queries: list[str], api_key: str) -> dict:
+class AdTokensClient:
     """
-    Perform batch search for multiple queries.
+    Minimal Ad-Tokens client that reuses one pooled HTTP connection.
     
-    Args:
-        queries: List of search queries
-        api_key: Your Ad-Tokens API key
-        
-    Returns:
-        Dictionary containing batch search results
+    Use as an async context manager so the connection is closed on exit.
     """
-    async with httpx.AsyncClient() as client:
+    
+    def __init__(self, api_key: str, base_url: str = "https://api.ad-tokens.com"):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "x-api-key": api_key,
+                "Content-Type": "application/json",
+            },
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+            timeout=DEFAULT_TIMEOUT,
+        )
+        # Per-query search results, keyed by sha256(query|limit)
+        self._cache = TTLCache(maxsize=1024, ttl=3600)
+    
+    async def __aenter__(self) -> "AdTokensClient":
+        return self
+    
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client and its pooled connections."""
+        await self._client.aclose()
+    
+    async def batch_search(self, queries: list[str], limit: int = 3) -> dict:
+        """
+        Perform batch search for multiple queries.
+        
+        Duplicate queries are sent once, and queries answered by an earlier
+        call within the last hour are served from the local cache. Results
+        are returned in the same order as `queries`.
+        
+        Args:
+            queries: List of search queries
+            limit: Number of results per query (1-10)
+            
+        Returns:
+            Dictionary containing batch search results; the server's
+            metadata is kept and `cached_queries` is added to it
+        """
         try:
-            # Prepare batch request
-            batch_request = {
-                "queries": [
-                    {"query": query, "limit": 3}
-                    for query in queries
-                ]
+            results, pending = self._split_cached(queries, limit)
+            cached_queries = len(results)
+            
+            metadata = {}
+            if pending:
+                # Prepare batch request
+                batch_request = {
+                    "queries": [
+                        {"query": query, "limit": limit}
+                        for query in pending
+                    ]
+                }
+                
+                response = await self._client.post(
+                    "/search/batch",
+                    content=orjson.dumps(batch_request),
+                    timeout=BATCH_TIMEOUT,
+                )
+                response.raise_for_status()
+                batch_result = orjson.loads(response.content)
+                
+                search_results = batch_result["results"]
+                if len(search_results) != len(pending):
+                    raise ValueError(
+                        f"Batch response has {len(search_results)} results "
+                        f"for {len(pending)} queries"
+                    )
+                for query, search_result in zip(pending, search_results):
+                    self._cache[self._cache_key(query, limit)] = copy.deepcopy(search_result)
+                    results[query] = search_result
+                
+                # The server's total_time_ms only covers the uncached queries
+                metadata.update(batch_result.get("metadata", {}))
+            
+            metadata["total_queries"] = len(queries)
+            metadata["cached_queries"] = cached_queries
+            
+            # Hand out copies so callers can't mutate cached entries, and
+            # duplicate queries don't share one result object
+            return {
+                "results": [copy.deepcopy(results[query]) for query in queries],
+                "metadata": metadata,
             }
             
-            response = await client.post(
-                "https://api.ad-tokens.com/search/batch",
-                headers={
-                    "x-api-key": api_key,
-                    "Content-Type": "application/json",
+        except httpx.HTTPStatusError as e:
+            print(f"❌ HTTP error: {e.response.status_code}")
+            print(f"   Error: {e.response.text}")
+            raise
+        except httpx.RequestError as e:
+            print(f"❌ Request error: {e}")
+            raise
+    
+    @staticmethod
+    def _cache_key(query: str, limit: int) -> str:
+        return hashlib.sha256(f"{query}|{limit}".encode()).hexdigest()
+    
+    def _split_cached(self, queries: list[str], limit: int) -> tuple[dict, list[str]]:
+        """Split unique queries into cached results and queries still to fetch."""
+        results = {}
+        pending = []
+        for query in dict.fromkeys(queries):
+            cached = self._cache.get(self._cache_key(query, limit), _MISSING)
+            if cached is not _MISSING:
+                results[query] = cached
+            else:
+                pending.append(query)
+        return results, pending
+    
+    async def batch_search_parallel(self, queries: list[str], limit: int = 3) -> dict:
+        """
+        Search for multiple queries as concurrent /search requests.
+        
+        Alternative to batch_search() for callers that want per-query
+        requests: over HTTP/2 all requests are multiplexed on the client's
+        single connection instead of opening one connection per query.
+        Duplicate queries are sent once.
+        
+        Args:
+            queries: List of search queries
+            limit: Number of results per query (1-10)
+            
+        Returns:
+            Dictionary in the same shape as the batch search response
+        """
+        try:
+            unique_queries = list(dict.fromkeys(queries))
+            responses = await asyncio.gather(*[
+                self._client.post(
+                    "/search",
+                    content=orjson.dumps({"query": query, "limit": limit}),
+                )
+                for query in unique_queries
+            ])
+            for response in responses:
+                response.raise_for_status()
+            
+            results = {
+                query: orjson.loads(response.content)
+                for query, response in zip(unique_queries, responses)
+            }
+            return {
+                "results": [results[query] for query in queries],
+                "metadata": {
+                    "total_queries": len(queries),
+                    "http_version": responses[0].http_version if responses else None,
                 },
-                json=batch_request,
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            return response.json()
+            }
             
         except httpx.HTTPStatusError as e:
             print(f"❌ HTTP error: {e.response.status_code}")
@@ -50,6 +204,84 @@ async def batch_search(queries: list[str], api_key: str) -> dict:
         except httpx.RequestError as e:
             print(f"❌ Request error: {e}")
             raise
+    
+    async def batch_search_streamed(
+        self, queries: list[str], limit: int = 3
+    ) -> AsyncIterator[dict]:
+        """
+        Perform batch search, yielding each query's results as they arrive.
+        
+        The response body is parsed incrementally, so the first query's
+        results can be processed while the rest are still being received.
+        Like batch_search(), duplicate queries are sent once and cached
+        queries are served locally, without a request if all are cached.
+        
+        Args:
+            queries: List of search queries
+            limit: Number of results per query (1-10)
+            
+        Yields:
+            Search results for each query, in the order of `queries`
+        """
+        results, pending = self._split_cached(queries, limit)
+        if not pending:
+            for query in queries:
+                yield copy.deepcopy(results[query])
+            return
+        
+        batch_request = {
+            "queries": [
+                {"query": query, "limit": limit}
+                for query in pending
+            ]
+        }
+        
+        try:
+            async with self._client.stream(
+                "POST",
+                "/search/batch",
+                content=orjson.dumps(batch_request),
+                timeout=BATCH_TIMEOUT,
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                
+                reader = _AsyncByteReader(response.aiter_bytes())
+                stream = ijson.items(reader, "results.item", use_float=True)
+                # The server answers pending queries in order; pull results
+                # off the stream only until the next query to yield is known
+                fetched = 0
+                for query in queries:
+                    while query not in results:
+                        search_result = await anext(stream, _MISSING)
+                        if search_result is _MISSING:
+                            raise ValueError(
+                                f"Batch response has {fetched} results "
+                                f"for {len(pending)} queries"
+                            )
+                        fetched_query = pending[fetched]
+                        self._cache[self._cache_key(fetched_query, limit)] = search_result
+                        results[fetched_query] = search_result
+                        fetched += 1
+                    yield copy.deepcopy(results[query])
+                
+                surplus = 0
+                async for _ in stream:
+                    surplus += 1
+                if surplus:
+                    raise ValueError(
+                        f"Batch response has {fetched + surplus} results "
+                        f"for {len(pending)} queries"
+                    )
+                    
+        except httpx.HTTPStatusError as e:
+            print(f"❌ HTTP error: {e.response.status_code}")
+            print(f"   Error: {e.response.text}")
+            raise
+        except httpx.RequestError as e:
+            print(f"❌ Request error: {e}")
+            raise
 
 
 async def main():
@@ -68,8 +300,9 @@ async def main():
     
     print(f"🔍 Batch searching for {len(queries)} queries...\n")
     
+    client = AdTokensClient(api_key)
     try:
-        result = await batch_search(queries, api_key)
+        result = await client.batch_search(queries)
         
         # Display results for each query
         for i, search_result in enumerate(result["results"], 1):
@@ -86,15 +319,42 @@ async def main():
         
         # Display batch metadata
         metadata = result.get("metadata", {})
-        if "total_queries" in metadata:
-            print(f"✅ Processed {metadata['total_queries']} queries")
-        if "total_time_ms" in metadata:
-            print(f"⏱️  Total time: {metadata['total_time_ms']:.2f}ms")
+        total_queries = metadata.get("total_queries")
+        if total_queries is not None:
+            print(f"✅ Processed {total_queries} queries")
+        cached_queries = metadata.get("cached_queries")
+        if cached_queries:
+            print(f"💾 Served {cached_queries} queries from cache")
+        total_time_ms = metadata.get("total_time_ms")
+        if total_time_ms is not None:
+            print(f"⏱️  Total time: {total_time_ms:.2f}ms")
+        
+        # Alternative: one /search request per query, multiplexed over HTTP/2
+        print("\n⚡ Searching the same queries as parallel requests...")
+        parallel_result = await client.batch_search_parallel(queries)
+        print(f"   Received {len(parallel_result['results'])} results "
+              f"over {parallel_result['metadata']['http_version']}")
+        
+        # Alternative: parse the batch response incrementally as it arrives
+        stream_queries = ["usb microphone", "webcam"]
+        print(f"\n🌊 Streaming batch results for {len(stream_queries)} more queries...")
+        i = 0
+        async for search_result in client.batch_search_streamed(stream_queries):
+            print(f"   {stream_queries[i]}: {len(search_result['results'])} products")
+            i += 1
             
     except Exception as e:
         print(f"❌ Error: {e}")
+    finally:
+        await client.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        # libuv-based event loop with lower per-callback overhead
+        uvloop.run(main())
 
@@ -3,57 +3,80 @@ Click Tracking Example
 
 This example demonstrates how to track product clicks for attribution compliance.
 Click tracking is required for Skimlinks/Amazon compliance.
+
+Requires: pip install 'httpx[http2]' orjson
+Optional: pip install uvloop (faster event loop)
 """
 
 import asyncio
 import os
 import httpx
+import orjson
+
+
+DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=1.0)
 
 
-async def search_products(query: str, api_key: str) -> dict:
-    """Search for products."""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.ad-tokens.com/search",
+class AdTokensClient:
+    """
+    Minimal Ad-Tokens client that reuses one pooled HTTP connection.
+    
+    Use as an async context manager so the connection is closed on exit.
+    """
+    
+    def __init__(self, api_key: str, base_url: str = "https://api.ad-tokens.com"):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
             headers={
                 "x-api-key": api_key,
                 "Content-Type": "application/json",
             },
-            json={"query": query, "limit": 3},
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+            timeout=DEFAULT_TIMEOUT,
+        )
+    
+    async def __aenter__(self) -> "AdTokensClient":
+        return self
+    
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client and its pooled connections."""
+        await self._client.aclose()
+    
+    async def search_products(self, query: str) -> dict:
+        """Search for products."""
+        response = await self._client.post(
+            "/search",
+            content=orjson.dumps({"query": query, "limit": 3}),
         )
         response.raise_for_status()
-        return response.json()
-
-
-async def track_click(impression_id: str, api_key: str, request_id: str = None) -> dict:
-    """
-    Track a product click for attribution compliance.
+        return orjson.loads(response.content)
     
-    Args:
-        impression_id: The impression_id from the product result
-        api_key: Your Ad-Tokens API key
-        request_id: Optional request_id from the original search
+    async def track_click(self, impression_id: str, request_id: str = None) -> dict:
+        """
+        Track a product click for attribution compliance.
         
-    Returns:
-        Dictionary containing click tracking confirmation
-    """
-    async with httpx.AsyncClient() as client:
+        Args:
+            impression_id: The impression_id from the product result
+            request_id: Optional request_id from the original search
+            
+        Returns:
+            Dictionary containing click tracking confirmation
+        """
         try:
             payload = {}
             if request_id:
                 payload["request_id"] = request_id
             
-            response = await client.post(
-                f"https://api.ad-tokens.com/clicks/{impression_id}",
-                headers={
-                    "x-api-key": api_key,
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=10.0,
+            response = await self._client.post(
+                f"/clicks/{impression_id}",
+                content=orjson.dumps(payload),
             )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
             
         except httpx.HTTPStatusError as e:
             print(f"❌ HTTP error: {e.response.status_code}")
@@ -64,10 +87,32 @@ async def track_click(impression_id: str, api_key: str, request_id: str = None)
             raise
 
 
-async def simulate_user_click(product: dict, request_id: str, api_key: str):
+async def record_click(client: AdTokensClient, impression_id: str, request_id: str):
+    """Track a click, reporting failures without interrupting the user flow."""
+    try:
+        result = await client.track_click(impression_id, request_id)
+        print(f"✅ Click tracked successfully")
+        print(f"   Timestamp: {result.get('timestamp')}")
+        return result
+    except Exception as e:
+        print(f"❌ Failed to track click: {e}")
+        # In production, you might want to retry or log this
+        return None
+
+
+def simulate_user_click(
+    product: dict, request_id: str, client: AdTokensClient, tg: asyncio.TaskGroup
+) -> asyncio.Task:
     """
     Simulate a user clicking on a product.
     In a real application, this would be triggered by actual user interaction.
+    
+    Click tracking is scheduled on the caller's task group and the user is
+    redirected immediately; the caller keeps working while the tracking
+    request is in flight, and the task group waits for it on exit.
+    
+    Returns:
+        The task tracking the click
     """
     impression_id = product["impression_id"]
     product_title = product["title"]
@@ -75,15 +120,10 @@ async def simulate_user_click(product: dict, request_id: str, api_key: str):
     print(f"👆 User clicked on: {product_title}")
     print(f"   Tracking click for impression: {impression_id}")
     
-    try:
-        result = await track_click(impression_id, api_key, request_id)
-        print(f"✅ Click tracked successfully")
-        print(f"   Timestamp: {result.get('timestamp')}")
-        return result
-    except Exception as e:
-        print(f"❌ Failed to track click: {e}")
-        # In production, you might want to retry or log this
-        return None
+    tracking = tg.create_task(record_click(client, impression_id, request_id))
+    print(f"↪️  Redirecting user to: {product['url']}")
+    
+    return tracking
 
 
 async def main():
@@ -97,8 +137,9 @@ async def main():
     query = "wireless headphones"
     print(f"🔍 Searching for: {query}\n")
     
+    client = AdTokensClient(api_key)
     try:
-        search_result = await search_products(query, api_key)
+        search_result = await client.search_products(query)
         request_id = search_result["request_id"]
         
         print(f"✅ Found {len(search_result['results'])} products\n")
@@ -113,20 +154,30 @@ async def main():
         
         # Step 2: Simulate user clicking on the first product
         print("-" * 50)
-        if search_result["results"]:
-            first_product = search_result["results"][0]
-            await simulate_user_click(first_product, request_id, api_key)
-        
-        print("\n💡 In your application:")
-        print("   1. Display products from search results")
-        print("   2. When user clicks a product link, call track_click()")
-        print("   3. Then redirect user to product URL")
-        print("   4. This ensures compliance with Skimlinks/Amazon requirements")
+        # Click tracking tasks run in this group; leaving it waits for them
+        async with asyncio.TaskGroup() as tracking:
+            if search_result["results"]:
+                first_product = search_result["results"][0]
+                simulate_user_click(first_product, request_id, client, tracking)
+            
+            print("\n💡 In your application:")
+            print("   1. Display products from search results")
+            print("   2. When user clicks a product link, schedule track_click() as a task")
+            print("   3. Redirect user to product URL while tracking completes")
+            print("   4. This ensures compliance with Skimlinks/Amazon requirements")
         
     except Exception as e:
         print(f"❌ Error: {e}")
+    finally:
+        await client.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        # libuv-based event loop with lower per-callback overhead
+        uvloop.run(main())
 
@@ -4,51 +4,82 @@ Feedback Submission Example
 This example demonstrates how to submit relevance feedback to help improve
 the recommendation engine. Feedback creates a data moat that improves
 recommendations over time.
+
+Requires: pip install 'httpx[http2]' orjson
+Optional: pip install uvloop (faster event loop)
 """
 
 import asyncio
+import contextlib
 import os
+from typing import Optional
+
 import httpx
+import orjson
+
 
+DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=1.0)
 
-async def search_products(query: str, api_key: str) -> dict:
-    """Search for products."""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.ad-tokens.com/search",
+
+class AdTokensClient:
+    """
+    Minimal Ad-Tokens client that reuses one pooled HTTP connection.
+    
+    Use as an async context manager so the connection is closed on exit.
+    """
+    
+    def __init__(self, api_key: str, base_url: str = "https://api.ad-tokens.com"):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
             headers={
                 "x-api-key": api_key,
                 "Content-Type": "application/json",
             },
-            json={"query": query, "limit": 3},
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+            timeout=DEFAULT_TIMEOUT,
+        )
+    
+    async def __aenter__(self) -> "AdTokensClient":
+        return self
+    
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client and its pooled connections."""
+        await self._client.aclose()
+    
+    async def search_products(self, query: str) -> dict:
+        """Search for products."""
+        response = await self._client.post(
+            "/search",
+            content=orjson.dumps({"query": query, "limit": 3}),
         )
         response.raise_for_status()
-        return response.json()
-
-
-async def submit_feedback(
-    request_id: str,
-    product_id: str,
-    relevant: bool,
-    api_key: str,
-    reason: str = None,
-    user_clicked: bool = None,
-) -> dict:
-    """
-    Submit relevance feedback for a product.
-    
-    Args:
-        request_id: The request_id from the search response
-        product_id: The product_id from the AdResponse
-        relevant: Whether the product was relevant to user intent
-        api_key: Your Ad-Tokens API key
-        reason: Optional explanation for why it was/wasn't relevant
-        user_clicked: Whether the user clicked on the product
+        return orjson.loads(response.content)
+    
+    async def submit_feedback(
+        self,
+        request_id: str,
+        product_id: str,
+        relevant: bool,
+        reason: str = None,
+        user_clicked: bool = None,
+    ) -> dict:
+        """
+        Submit relevance feedback for a product.
         
-    Returns:
-        Dictionary containing feedback confirmation
-    """
-    async with httpx.AsyncClient() as client:
+        Args:
+            request_id: The request_id from the search response
+            product_id: The product_id from the AdResponse
+            relevant: Whether the product was relevant to user intent
+            reason: Optional explanation for why it was/wasn't relevant
+            user_clicked: Whether the user clicked on the product
+            
+        Returns:
+            Dictionary containing feedback confirmation
+        """
         try:
             payload = {
                 "request_id": request_id,
@@ -61,17 +92,9 @@ async def submit_feedback(
             if user_clicked is not None:
                 payload["user_clicked"] = user_clicked
             
-            response = await client.post(
-                "https://api.ad-tokens.com/feedback",
-                headers={
-                    "x-api-key": api_key,
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=10.0,
-            )
+            response = await self._client.post("/feedback", content=orjson.dumps(payload))
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
             
         except httpx.HTTPStatusError as e:
             print(f"❌ HTTP error: {e.response.status_code}")
@@ -82,6 +105,97 @@ async def submit_feedback(
             raise
 
 
+class FeedbackBatcher:
+    """
+    Coalesce feedback submissions into concurrent bursts.
+    
+    submit() only enqueues the feedback. A background worker collects up to
+    `max_items` queued records, waiting at most `max_wait` seconds after the
+    first one, and sends them concurrently over the client's shared HTTP/2
+    connection, so a busy app pays one round trip per burst instead of one
+    per record. Use as an async context manager (or call close()) to send
+    any queued feedback on shutdown. Records that could not be sent are
+    collected in `failed`.
+    """
+    
+    def __init__(self, client: AdTokensClient, max_items: int = 50, max_wait: float = 0.2):
+        self.client = client
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self.failed: list[dict] = []
+        self._queue: asyncio.Queue[dict] = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def __aenter__(self) -> "FeedbackBatcher":
+        return self
+    
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+    
+    async def submit(
+        self,
+        request_id: str,
+        product_id: str,
+        relevant: bool,
+        reason: str = None,
+        user_clicked: bool = None,
+    ) -> None:
+        """Queue feedback; takes the same arguments as AdTokensClient.submit_feedback."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        self._queue.put_nowait({
+            "request_id": request_id,
+            "product_id": product_id,
+            "relevant": relevant,
+            "reason": reason,
+            "user_clicked": user_clicked,
+        })
+    
+    async def close(self) -> None:
+        """Wait for queued feedback to be sent, then stop the worker."""
+        worker, self._worker = self._worker, None
+        if worker is None:
+            return
+        # Stop waiting if the worker dies, or join() would never return
+        join = asyncio.ensure_future(self._queue.join())
+        await asyncio.wait({join, worker}, return_when=asyncio.FIRST_COMPLETED)
+        join.cancel()
+        worker.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await worker
+    
+    async def _run(self):
+        while True:
+            batch = await self._drain()
+            try:
+                # submit_feedback reports its own errors; keep the worker alive
+                results = await asyncio.gather(
+                    *[self.client.submit_feedback(**feedback) for feedback in batch],
+                    return_exceptions=True,
+                )
+                for feedback, result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        self.failed.append(feedback)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _drain(self) -> list[dict]:
+        """Wait for one record, then collect more until full or max_wait passes."""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_items:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+
 async def main():
     api_key = os.getenv("AD_TOKENS_API_KEY", "your-api-key-here")
     
@@ -93,8 +207,9 @@ async def main():
     query = "budget laptop for students"
     print(f"🔍 Searching for: {query}\n")
     
+    client = AdTokensClient(api_key)
     try:
-        search_result = await search_products(query, api_key)
+        search_result = await client.search_products(query)
         request_id = search_result["request_id"]
         
         print(f"✅ Found {len(search_result['results'])} products\n")
@@ -114,11 +229,10 @@ async def main():
             first_product = search_result["results"][0]
             
             # Example: Product was relevant and user clicked
-            feedback_result = await submit_feedback(
+            feedback_result = await client.submit_feedback(
                 request_id=request_id,
                 product_id=first_product["product_id"],
                 relevant=True,
-                api_key=api_key,
                 reason="Good match for budget laptop requirement",
                 user_clicked=True,
             )
@@ -127,16 +241,41 @@ async def main():
             print(f"   Feedback ID: {feedback_result.get('feedback_id')}")
             print(f"   Message: {feedback_result.get('message')}")
         
+        # Step 3: Queue feedback for the remaining products in one burst
+        other_products = search_result["results"][1:]
+        if other_products:
+            async with FeedbackBatcher(client) as batcher:
+                for product in other_products:
+                    await batcher.submit(
+                        request_id=request_id,
+                        product_id=product["product_id"],
+                        relevant=True,
+                        user_clicked=False,
+                    )
+            sent = len(other_products) - len(batcher.failed)
+            print(f"\n✅ Batched feedback for {sent} more products")
+            if batcher.failed:
+                print(f"❌ Failed to submit feedback for {len(batcher.failed)} products")
+        
         print("\n💡 In your application:")
         print("   - Add 'Was this helpful?' buttons to product results")
         print("   - Collect feedback from users")
         print("   - Submit feedback to improve recommendations")
+        print("   - Use FeedbackBatcher when submitting feedback at high volume")
         print("   - This creates a data moat that improves over time")
         
     except Exception as e:
         print(f"❌ Error: {e}")
+    finally:
+        await client.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        # libuv-based event loop with lower per-callback overhead
+        uvloop.run(main())
 
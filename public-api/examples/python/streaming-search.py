@@ -3,82 +3,107 @@ Streaming Search Example
 
 This example demonstrates how to use Server-Sent Events (SSE) streaming
 to receive search results in real-time.
+
+Requires: pip install 'httpx[http2]' httpx-sse orjson
+Optional: pip install uvloop (faster event loop)
 """
 
 import asyncio
-import json
 import os
 import httpx
+import orjson
+from httpx_sse import aconnect_sse
+
+
+DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=1.0)
+# Streams stay open while results arrive, so allow a longer read
+STREAM_TIMEOUT = httpx.Timeout(connect=2.0, read=60.0, write=5.0, pool=1.0)
 
 
-async def stream_search(query: str, api_key: str):
+class AdTokensClient:
     """
-    Perform a streaming search using Server-Sent Events.
+    Minimal Ad-Tokens client that reuses one pooled HTTP connection.
     
-    Args:
-        query: The search query
-        api_key: Your Ad-Tokens API key
+    Use as an async context manager so the connection is closed on exit.
     """
-    async with httpx.AsyncClient() as client:
+    
+    def __init__(self, api_key: str, base_url: str = "https://api.ad-tokens.com"):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "x-api-key": api_key,
+                "Content-Type": "application/json",
+            },
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+            timeout=DEFAULT_TIMEOUT,
+        )
+    
+    async def __aenter__(self) -> "AdTokensClient":
+        return self
+    
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client and its pooled connections."""
+        await self._client.aclose()
+    
+    async def stream_search(self, query: str):
+        """
+        Perform a streaming search using Server-Sent Events.
+        
+        Args:
+            query: The search query
+        """
         try:
-            async with client.stream(
+            async with aconnect_sse(
+                self._client,
                 "POST",
-                "https://api.ad-tokens.com/search",
-                headers={
-                    "x-api-key": api_key,
-                    "Content-Type": "application/json",
-                },
-                json={
+                "/search",
+                content=orjson.dumps({
                     "query": query,
                     "limit": 5,
                     "stream": True,  # Enable streaming
-                },
-                timeout=30.0,
-            ) as response:
-                response.raise_for_status()
+                }),
+                timeout=STREAM_TIMEOUT,
+            ) as event_source:
+                if event_source.response.is_error:
+                    await event_source.response.aread()
+                event_source.response.raise_for_status()
                 
                 print(f"🔍 Streaming search for: {query}\n")
                 print("📡 Waiting for results...\n")
                 
-                buffer = ""
                 products_received = 0
                 
-                async for chunk in response.aiter_text():
-                    buffer += chunk
+                # aiter_sse() yields fully assembled events, including
+                # multi-line data fields and \r\n line endings
+                async for sse in event_source.aiter_sse():
+                    if not sse.data:
+                        continue
                     
-                    # Process complete lines
-                    while "\n" in buffer:
-                        line, buffer = buffer.split("\n", 1)
-                        line = line.strip()
+                    try:
+                        data = orjson.loads(sse.data)
                         
-                        if not line:
-                            continue
+                        # Handle different event types
+                        results = data.get("results")
+                        if results is not None:
+                            for product in results:
+                                products_received += 1
+                                print(f"✅ Product {products_received}: {product['title']}")
+                                print(f"   Price: {product['price']}")
+                                print(f"   Relevance: {product['relevance_score']:.2%}\n")
                         
-                        # SSE format: "event: result\ndata: {...}\n\n"
-                        if line.startswith("event: "):
-                            event_type = line[7:]
-                            continue
-                        
-                        if line.startswith("data: "):
-                            try:
-                                data = json.loads(line[6:])
-                                
-                                # Handle different event types
-                                if "results" in data:
-                                    for product in data["results"]:
-                                        products_received += 1
-                                        print(f"✅ Product {products_received}: {product['title']}")
-                                        print(f"   Price: {product['price']}")
-                                        print(f"   Relevance: {product['relevance_score']:.2%}\n")
+                        metadata = data.get("metadata")
+                        if metadata is not None:
+                            total_matches = metadata.get("total_matches")
+                            if total_matches is not None:
+                                print(f"📊 Total matches: {total_matches}")
                                 
-                                if "metadata" in data:
-                                    metadata = data["metadata"]
-                                    if "total_matches" in metadata:
-                                        print(f"📊 Total matches: {metadata['total_matches']}")
-                                        
-                            except json.JSONDecodeError as e:
-                                print(f"⚠️  Failed to parse JSON: {e}")
-                                print(f"   Line: {line}")
+                    except orjson.JSONDecodeError as e:
+                        print(f"⚠️  Failed to parse JSON in '{sse.event}' event: {e}")
+                        print(f"   Data: {sse.data}")
                 
                 print(f"\n✨ Received {products_received} products via streaming")
                 
@@ -97,9 +122,16 @@ async def main():
         return
     
     query = "mechanical keyboard for programming"
-    await stream_search(query, api_key)
+    async with AdTokensClient(api_key) as client:
+        await client.stream_search(query)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        # libuv-based event loop with lower per-callback overhead
+        uvloop.run(main())
 